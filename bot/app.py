@@ -2,20 +2,48 @@
 Main application entrypoint for the Telegram bot.
 Supports both polling (development) and webhook (production) modes.
 """
+import asyncio
+import hmac
 import sys
+from contextlib import suppress
+from typing import Any, AsyncIterator
+
+import orjson
 from aiohttp import web
 from telegram import Update
 from telegram.ext import Application, CommandHandler
 
 from bot.config import Config
 from bot.conversation import create_conversation_handler, delete_user_data
-from bot.db.session import check_db_connection
+from bot.db.session import (
+    check_db_connection,
+    dispose_engine,
+    ping_db,
+    run_upsert_worker,
+)
 from bot.logging_config import setup_logging, get_logger
+from bot.update_processor import PerChatUpdateProcessor
+
+try:
+    import uvloop
+except ImportError:  # uvloop is optional and unavailable on Windows
+    uvloop = None
 
 # Setup logging
 setup_logging()
 logger = get_logger(__name__)
 
+# Seconds the /ready probe waits for the database before reporting 503
+_READY_TIMEOUT = 2.0
+
+# Update types requested from Telegram in both polling and webhook mode
+_ALLOWED_UPDATES = ("message", "callback_query")
+
+# Webhook secret header and expected value, resolved once at import
+_SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+_SECRET = Config.WEBHOOK_SECRET
+_SECRET_BYTES = _SECRET.encode()
+
 
 async def health_check(request: web.Request) -> web.Response:
     """
@@ -30,6 +58,27 @@ async def health_check(request: web.Request) -> web.Response:
     return web.Response(text="OK", status=200)
 
 
+async def readiness_check(request: web.Request) -> web.Response:
+    """
+    Readiness endpoint that also verifies the database is reachable.
+
+    Args:
+        request: aiohttp request object
+
+    Returns:
+        web.Response: HTTP 200 if the database answers, 503 otherwise
+    """
+    try:
+        await asyncio.wait_for(ping_db(), timeout=_READY_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.warning("Readiness check timed out after %ss", _READY_TIMEOUT)
+        return web.Response(text="UNAVAILABLE", status=503)
+    except Exception as e:
+        logger.warning("Readiness check failed: %s", e)
+        return web.Response(text="UNAVAILABLE", status=503)
+    return web.Response(text="READY", status=200)
+
+
 async def webhook_handler(request: web.Request) -> web.Response:
     """
     Handle incoming webhook requests from Telegram.
@@ -38,29 +87,97 @@ async def webhook_handler(request: web.Request) -> web.Response:
         request: aiohttp request object
 
     Returns:
-        web.Response: HTTP 200 response
+        web.Response: HTTP 200 once the update is queued
     """
-    # Verify webhook secret
-    secret_token = request.headers.get("X-Telegram-Bot-Api-Secret-Token")
-    if secret_token != Config.WEBHOOK_SECRET:
+    # Verify webhook secret in constant time so timing doesn't leak it
+    secret_token = request.headers.get(_SECRET_HEADER, "")
+    if not hmac.compare_digest(
+        secret_token.encode(errors="surrogateescape"), _SECRET_BYTES
+    ):
         logger.warning("Invalid webhook secret token received")
         return web.Response(status=403)
 
-    # Get the bot application from app state
-    application: Application = request.app["application"]
-
-    # Process the update
+    # Parse and queue the update; dispatch_raw_updates decides what to build
     try:
-        data = await request.json()
-        update = Update.de_json(data, application.bot)
-        await application.process_update(update)
-    except Exception as e:
-        logger.error(f"Error processing webhook update: {e}")
-        return web.Response(status=500)
+        # orjson parses the raw body much faster than aiohttp's stdlib json path
+        data = orjson.loads(await request.read())
+    except orjson.JSONDecodeError as e:
+        logger.error("Invalid webhook payload: %s", e)
+        return web.Response(status=400)
 
+    request.app["raw_updates"].put_nowait(data)
     return web.Response(status=200)
 
 
+def is_routable_update(data: Any) -> bool:
+    """
+    Check whether a raw update could reach one of the bot's handlers.
+
+    Every handler (the /start, /cancel and /delete commands and the
+    conversation steps) needs a text message, so anything else is dropped
+    before PTB builds Update objects for it.
+
+    Args:
+        data: Update payload decoded from JSON
+
+    Returns:
+        bool: True if the update carries a text message
+    """
+    message = data.get("message") if isinstance(data, dict) else None
+    return isinstance(message, dict) and isinstance(message.get("text"), str)
+
+
+async def dispatch_raw_updates(app: web.Application) -> None:
+    """
+    Turn queued raw webhook payloads into Updates for the bot application.
+
+    Updates that no handler could match are discarded without calling
+    Update.de_json; the rest go on PTB's update_queue, which the running
+    application processes (concurrently across chats).
+
+    Args:
+        app: aiohttp application holding the queue, bot and application
+    """
+    raw_updates: asyncio.Queue = app["raw_updates"]
+    application: Application = app["application"]
+    bot = app["bot"]
+
+    while True:
+        data = await raw_updates.get()
+        try:
+            if not is_routable_update(data):
+                continue
+            update = Update.de_json(data, bot)
+            await application.update_queue.put(update)
+        except Exception as e:
+            logger.error("Error decoding webhook update: %s", e)
+        finally:
+            raw_updates.task_done()
+
+
+async def raw_update_dispatcher(app: web.Application) -> AsyncIterator[None]:
+    """
+    aiohttp cleanup context running dispatch_raw_updates with the server.
+
+    Telegram won't resend updates it already got a 200 for, so on cleanup
+    (after the server has stopped accepting requests) every queued payload
+    is handed to the application before the dispatcher is cancelled.
+
+    Args:
+        app: aiohttp application
+    """
+    raw_updates: asyncio.Queue = asyncio.Queue()
+    app["raw_updates"] = raw_updates
+    task = asyncio.create_task(dispatch_raw_updates(app))
+    yield
+    if raw_updates.qsize():
+        logger.info("Dispatching %s queued webhook updates before shutdown", raw_updates.qsize())
+    await raw_updates.join()
+    task.cancel()
+    with suppress(asyncio.CancelledError):
+        await task
+
+
 def create_application() -> Application:
     """
     Create and configure the Telegram bot application.
@@ -69,7 +186,17 @@ def create_application() -> Application:
         Application: Configured bot application
     """
     # Create application
-    application = Application.builder().token(Config.TELEGRAM_BOT_TOKEN).build()
+    # Updates from different chats are processed concurrently, while each
+    # chat's updates run one at a time so conversation steps stay in order
+    application = (
+        Application.builder()
+        .token(Config.TELEGRAM_BOT_TOKEN)
+        .concurrent_updates(PerChatUpdateProcessor())
+        .build()
+    )
+
+    # Queue of user upserts, committed in batches by run_upsert_worker
+    application.bot_data["upsert_queue"] = asyncio.Queue()
 
     # Add conversation handler
     conversation_handler = create_conversation_handler()
@@ -96,16 +223,13 @@ async def run_polling(application: Application) -> None:
     await application.start()
 
     # Start polling
-    await application.updater.start_polling(
-        allowed_updates=["message", "callback_query"]
-    )
+    await application.updater.start_polling(allowed_updates=_ALLOWED_UPDATES)
 
     logger.info("Bot is now polling for updates. Press Ctrl+C to stop.")
 
     # Keep the bot running
     try:
         # Wait forever
-        import asyncio
         await asyncio.Event().wait()
     except (KeyboardInterrupt, asyncio.CancelledError):
         logger.info("Received interrupt signal, shutting down...")
@@ -130,38 +254,40 @@ async def run_webhook(application: Application) -> None:
     await application.start()
 
     # Set webhook
-    webhook_url = Config.get_webhook_url()
-    logger.info(f"Setting webhook to: {webhook_url}")
+    webhook_url = Config.WEBHOOK_URL
+    logger.info("Setting webhook to: %s", webhook_url)
 
     await application.bot.set_webhook(
         url=webhook_url,
-        allowed_updates=["message", "callback_query"],
-        secret_token=Config.WEBHOOK_SECRET,
+        allowed_updates=_ALLOWED_UPDATES,
+        secret_token=_SECRET,
     )
 
     # Create web application
     app = web.Application()
     app["application"] = application
+    app["bot"] = application.bot
+    app.cleanup_ctx.append(raw_update_dispatcher)
 
     # Add routes
     app.router.add_get("/healthz", health_check)
+    app.router.add_get("/ready", readiness_check)
     app.router.add_post(Config.WEBHOOK_PATH, webhook_handler)
 
     # Start web server
     port = int(sys.argv[1]) if len(sys.argv) > 1 else 8080
-    logger.info(f"Starting webhook server on port {port}")
+    logger.info("Starting webhook server on port %s", port)
 
     runner = web.AppRunner(app)
     await runner.setup()
     site = web.TCPSite(runner, "0.0.0.0", port)
     await site.start()
 
-    logger.info(f"Webhook server running on port {port}. Press Ctrl+C to stop.")
+    logger.info("Webhook server running on port %s. Press Ctrl+C to stop.", port)
 
     # Keep the server running
     try:
         # Wait forever
-        import asyncio
         await asyncio.Event().wait()
     except KeyboardInterrupt:
         logger.info("Received interrupt signal, shutting down...")
@@ -172,30 +298,64 @@ async def run_webhook(application: Application) -> None:
         await application.shutdown()
 
 
+async def start_bot() -> None:
+    """
+    Check the database, then run the bot in the configured mode.
+
+    The database check runs on the same event loop as the bot so pooled
+    async connections stay bound to a single loop. The application is
+    built in a worker thread meanwhile, so startup doesn't wait on both.
+    """
+    # Check database connection while creating the application
+    db_ok, application = await asyncio.gather(
+        check_db_connection(),
+        asyncio.to_thread(create_application),
+    )
+    if not db_ok:
+        logger.error("Failed to connect to database. Exiting.")
+        await dispose_engine()
+        sys.exit(1)
+
+    # Start the background writer for queued user upserts
+    upsert_worker = asyncio.create_task(
+        run_upsert_worker(application.bot_data["upsert_queue"])
+    )
+
+    # Run in appropriate mode
+    try:
+        if Config.IS_PRODUCTION:
+            await run_webhook(application)
+        else:
+            await run_polling(application)
+    finally:
+        upsert_worker.cancel()
+        with suppress(asyncio.CancelledError):
+            await upsert_worker
+        await dispose_engine()
+
+
 def main() -> None:
     """
     Main entry point for the bot application.
     """
     logger.info("=" * 60)
     logger.info("Telegram Bot Starting")
-    logger.info(f"Environment: {Config.ENV}")
+    logger.info("Environment: %s", Config.ENV)
     logger.info("=" * 60)
 
-    # Check database connection
-    if not check_db_connection():
-        logger.error("Failed to connect to database. Exiting.")
+    # Validate configuration before touching the database or Telegram
+    try:
+        Config.validate()
+    except ValueError as e:
+        logger.error("Invalid configuration: %s", e)
         sys.exit(1)
 
-    # Create application
-    application = create_application()
-
-    # Run in appropriate mode
-    import asyncio
-
-    if Config.is_production():
-        asyncio.run(run_webhook(application))
+    # Use uvloop's faster event loop when it's available (not on Windows)
+    if uvloop is not None:
+        logger.info("Using uvloop event loop")
+        uvloop.run(start_bot())
     else:
-        asyncio.run(run_polling(application))
+        asyncio.run(start_bot())
 
 
 if __name__ == "__main__":
@@ -19,6 +19,10 @@ class Config:
     # Database connection URL (required)
     DATABASE_URL: str = os.getenv("DATABASE_URL", "")
 
+    # CA bundle for TLS database connections (optional). aiomysql needs an
+    # SSLContext, so this replaces ssl_* query parameters in DATABASE_URL
+    DATABASE_SSL_CA: str = os.getenv("DATABASE_SSL_CA", "")
+
     # Environment: development or production
     ENV: str = os.getenv("ENV", "development")
 
@@ -27,6 +31,12 @@ class Config:
     WEBHOOK_DOMAIN: str = os.getenv("WEBHOOK_DOMAIN", "")
     WEBHOOK_PATH: str = os.getenv("WEBHOOK_PATH", "/webhook")
 
+    # Derived values, computed once since the settings above don't change
+    IS_PRODUCTION: bool = ENV == "production"
+    WEBHOOK_URL: Optional[str] = (
+        f"https://{WEBHOOK_DOMAIN}{WEBHOOK_PATH}" if IS_PRODUCTION else None
+    )
+
     # Conversation timeout (in seconds)
     CONVERSATION_TIMEOUT: int = int(os.getenv("CONVERSATION_TIMEOUT", "600"))  # 10 minutes
 
@@ -42,24 +52,9 @@ class Config:
         if cls.ENV not in ("development", "production"):
             raise ValueError("ENV must be 'development' or 'production'")
 
-        if cls.ENV == "production":
+        if cls.IS_PRODUCTION:
             if not cls.WEBHOOK_SECRET:
                 raise ValueError("WEBHOOK_SECRET is required in production")
             if not cls.WEBHOOK_DOMAIN:
                 raise ValueError("WEBHOOK_DOMAIN is required in production")
 
-    @classmethod
-    def is_production(cls) -> bool:
-        """Check if running in production mode."""
-        return cls.ENV == "production"
-
-    @classmethod
-    def get_webhook_url(cls) -> Optional[str]:
-        """Get the full webhook URL for production."""
-        if not cls.is_production():
-            return None
-        return f"https://{cls.WEBHOOK_DOMAIN}{cls.WEBHOOK_PATH}"
-
-
-# Validate configuration on import
-Config.validate()
@@ -1,6 +1,9 @@
 """
 Conversation handler and validators for the Telegram bot.
 """
+import re
+from typing import Optional
+
 from telegram import Update
 from telegram.ext import (
     CommandHandler,
@@ -10,8 +13,8 @@ from telegram.ext import (
     filters,
 )
 
-from bot.db.crud import insert_or_update_user, delete_user
-from bot.db.session import get_db_session
+from bot.db.crud import delete_user
+from bot.db.session import get_db_session, queue_user_upsert
 from bot.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -19,20 +22,29 @@ logger = get_logger(__name__)
 # Conversation states
 ASK_NAME, ASK_AGE, ASK_ADDRESS = range(3)
 
+# Surrounding whitespace, then 1-100 (name) or 1-255 (address) characters
+# that start and end with non-whitespace; group 1 is the stripped value
+_NAME_RE = re.compile(r"\s*(\S(?:.{0,98}\S)?)\s*", re.DOTALL)
+_ADDRESS_RE = re.compile(r"\s*(\S(?:.{0,253}\S)?)\s*", re.DOTALL)
+
+# Plain text replies for every conversation step, built once and shared
+_TEXT_NOT_COMMAND = filters.TEXT & ~filters.COMMAND
+
 
 # ===== Validators =====
 
-def is_valid_name(text: str) -> bool:
+def clean_name(text: str) -> Optional[str]:
     """
-    Validate user's name.
+    Validate and strip user's name.
 
     Args:
         text: The name to validate
 
     Returns:
-        bool: True if valid, False otherwise
+        Optional[str]: The stripped name if valid, None otherwise
     """
-    return bool(text and text.strip() and len(text.strip()) <= 100)
+    match = _NAME_RE.fullmatch(text) if text else None
+    return match.group(1) if match else None
 
 
 def parse_age(text: str) -> int:
@@ -57,17 +69,18 @@ def parse_age(text: str) -> int:
         raise ValueError(f"Invalid age: {e}")
 
 
-def is_valid_address(text: str) -> bool:
+def clean_address(text: str) -> Optional[str]:
     """
-    Validate user's address.
+    Validate and strip user's address.
 
     Args:
         text: The address to validate
 
     Returns:
-        bool: True if valid, False otherwise
+        Optional[str]: The stripped address if valid, None otherwise
     """
-    return bool(text and text.strip() and len(text.strip()) <= 255)
+    match = _ADDRESS_RE.fullmatch(text) if text else None
+    return match.group(1) if match else None
 
 
 # ===== Command Handlers =====
@@ -84,7 +97,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         int: Next conversation state (ASK_NAME)
     """
     user_id = update.effective_user.id
-    logger.info(f"User {user_id} started conversation")
+    logger.info("User %s started conversation", user_id)
 
     # Check if it's a private chat
     if update.effective_chat.type != "private":
@@ -121,7 +134,7 @@ async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         int: ConversationHandler.END
     """
     user_id = update.effective_user.id
-    logger.info(f"User {user_id} cancelled conversation")
+    logger.info("User %s cancelled conversation", user_id)
 
     context.user_data.clear()
 
@@ -145,11 +158,11 @@ async def delete_user_data(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         int: ConversationHandler.END
     """
     user_id = update.effective_user.id
-    logger.info(f"User {user_id} requested data deletion")
+    logger.info("User %s requested data deletion", user_id)
 
     try:
-        with get_db_session() as session:
-            deleted = delete_user(session, user_id)
+        async with get_db_session() as session:
+            deleted = await delete_user(session, user_id)
 
         if deleted:
             await update.message.reply_text(
@@ -163,7 +176,7 @@ async def delete_user_data(update: Update, context: ContextTypes.DEFAULT_TYPE) -
             )
 
     except Exception as e:
-        logger.error(f"Error deleting user data for {user_id}: {e}")
+        logger.error("Error deleting user data for %s: %s", user_id, e)
         await update.message.reply_text(
             "Sorry, there was an error deleting your data. Please try again later."
         )
@@ -185,10 +198,10 @@ async def ask_name(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         int: Next conversation state (ASK_AGE or ASK_NAME if invalid)
     """
     user_id = update.effective_user.id
-    name = update.message.text
+    name = clean_name(update.message.text)
 
-    if not is_valid_name(name):
-        logger.info(f"User {user_id} provided invalid name")
+    if name is None:
+        logger.info("User %s provided invalid name", user_id)
         await update.message.reply_text(
             "I couldn't read that name. Please enter your full name\n"
             "(1–100 characters, letters/numbers/spaces allowed)."
@@ -196,11 +209,11 @@ async def ask_name(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         return ASK_NAME
 
     # Store name in context
-    context.user_data['name'] = name.strip()
-    logger.info(f"User {user_id} provided valid name")
+    context.user_data['name'] = name
+    logger.info("User %s provided valid name", user_id)
 
     await update.message.reply_text(
-        f"Great, thanks {name.strip()}.\n"
+        f"Great, thanks {name}.\n"
         f"How old are you? (Please enter a number between 13 and 120)"
     )
 
@@ -224,7 +237,7 @@ async def ask_age(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     try:
         age = parse_age(age_text)
         context.user_data['age'] = age
-        logger.info(f"User {user_id} provided valid age")
+        logger.info("User %s provided valid age", user_id)
 
         await update.message.reply_text(
             "Got it. What's your address?\n"
@@ -234,7 +247,7 @@ async def ask_age(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         return ASK_ADDRESS
 
     except ValueError as e:
-        logger.info(f"User {user_id} provided invalid age: {e}")
+        logger.info("User %s provided invalid age: %s", user_id, e)
 
         # Check if it's a range error or parsing error
         if "out of range" in str(e):
@@ -263,35 +276,40 @@ async def ask_address(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int
         int: ConversationHandler.END
     """
     user_id = update.effective_user.id
-    address = update.message.text
+    address = clean_address(update.message.text)
 
-    if not is_valid_address(address):
-        logger.info(f"User {user_id} provided invalid address")
+    if address is None:
+        logger.info("User %s provided invalid address", user_id)
         await update.message.reply_text(
             "Please enter a non-empty address up to 255 characters.\n"
             "For example: 123 Main St, Springfield, IL 62704"
         )
         return ASK_ADDRESS
 
-    context.user_data['address'] = address.strip()
-    logger.info(f"User {user_id} provided valid address")
+    logger.info("User %s provided valid address", user_id)
 
-    # Save to database
-    name = context.user_data['name']
-    age = context.user_data['age']
-    address = context.user_data['address']
+    # Take the collected values out of user_data; this also clears it
+    name = context.user_data.pop('name', None)
+    age = context.user_data.pop('age', None)
+    if name is None or age is None:
+        logger.info("User %s sent an address without a name and age", user_id)
+        await update.message.reply_text(
+            "Sorry, I lost track of your earlier answers.\n"
+            "Please send /start to begin again."
+        )
+        return ConversationHandler.END
 
     try:
-        with get_db_session() as session:
-            user = insert_or_update_user(
-                session,
-                telegram_user_id=user_id,
-                name=name,
-                age=age,
-                address=address
-            )
+        # The batch writer commits this together with other chats' upserts
+        await queue_user_upsert(
+            context.bot_data["upsert_queue"],
+            telegram_user_id=user_id,
+            name=name,
+            age=age,
+            address=address
+        )
 
-        logger.info(f"Successfully saved data for user {user_id}")
+        logger.info("Successfully saved data for user %s", user_id)
 
         await update.message.reply_text(
             "All set! I've saved your details.\n\n"
@@ -303,14 +321,11 @@ async def ask_address(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int
         )
 
     except Exception as e:
-        logger.error(f"Error saving user data for {user_id}: {e}")
+        logger.error("Error saving user data for %s: %s", user_id, e)
         await update.message.reply_text(
             "Sorry, there was an error saving your data. Please try again later."
         )
 
-    # Clear conversation data
-    context.user_data.clear()
-
     return ConversationHandler.END
 
 
@@ -326,9 +341,9 @@ def create_conversation_handler() -> ConversationHandler:
     return ConversationHandler(
         entry_points=[CommandHandler("start", start)],
         states={
-            ASK_NAME: [MessageHandler(filters.TEXT & ~filters.COMMAND, ask_name)],
-            ASK_AGE: [MessageHandler(filters.TEXT & ~filters.COMMAND, ask_age)],
-            ASK_ADDRESS: [MessageHandler(filters.TEXT & ~filters.COMMAND, ask_address)],
+            ASK_NAME: [MessageHandler(_TEXT_NOT_COMMAND, ask_name)],
+            ASK_AGE: [MessageHandler(_TEXT_NOT_COMMAND, ask_age)],
+            ASK_ADDRESS: [MessageHandler(_TEXT_NOT_COMMAND, ask_address)],
         },
         fallbacks=[
             CommandHandler("cancel", cancel),
@@ -1,18 +1,83 @@
 """
 CRUD operations for the User model.
 """
-from typing import Optional
+import functools
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
 
-from sqlalchemy.orm import Session
+from cachetools import TTLCache
+from sqlalchemy import Insert, Select, Update, bindparam, func, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import DBAPIError, DisconnectionError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.db.models import User
 from bot.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# telegram_user_id -> users.id for rows recently seen in the database, so
+# repeat submissions can skip the INSERT attempt and update by primary key
+_USER_ID_CACHE: TTLCache[int, int] = TTLCache(maxsize=10_000, ttl=300)
 
-def insert_or_update_user(
-    session: Session,
+# Lookups are built once; SQLAlchemy's compiled cache then reuses their SQL
+_GET_BY_TID = select(User).where(User.telegram_user_id == bindparam("tid"))
+_GET_BY_PK = select(User).where(User.id == bindparam("pk"))
+
+_T = TypeVar("_T")
+
+
+def _is_disconnect(error: Exception) -> bool:
+    """Check whether an error means the pooled connection was dead."""
+    if isinstance(error, DisconnectionError):
+        return True
+    return isinstance(error, DBAPIError) and error.connection_invalidated
+
+
+def _retry_on_disconnect(
+    fn: Callable[..., Awaitable[_T]]
+) -> Callable[..., Awaitable[_T]]:
+    """
+    Retry a CRUD operation once if its pooled connection turns out to be dead.
+
+    The engine doesn't ping connections on checkout, so a connection dropped
+    by the server is only noticed when it's used. The session is rolled back
+    to discard the dead connection before the single retry. Decorated
+    functions must take the session as their first argument and be its
+    first unit of work, since the rollback discards anything pending.
+    A disconnect is logged as a warning, and as an error only if the
+    retry fails the same way.
+
+    Args:
+        fn: Async CRUD function taking the session as first argument
+
+    Returns:
+        The wrapped function
+    """
+    @functools.wraps(fn)
+    async def wrapper(session: AsyncSession, *args: Any, **kwargs: Any) -> _T:
+        try:
+            return await fn(session, *args, **kwargs)
+        except Exception as e:
+            if not _is_disconnect(e):
+                raise
+            logger.warning("Database connection lost in %s, retrying once: %s", fn.__name__, e)
+
+        await session.rollback()
+        try:
+            return await fn(session, *args, **kwargs)
+        except Exception as e:
+            if _is_disconnect(e):
+                logger.error("Database connection lost again in %s: %s", fn.__name__, e)
+            raise
+
+    return wrapper
+
+
+@_retry_on_disconnect
+async def insert_or_update_user(
+    session: AsyncSession,
     telegram_user_id: int,
     name: str,
     age: int,
@@ -22,7 +87,7 @@ def insert_or_update_user(
     Insert a new user or update an existing user's information.
 
     Args:
-        session: SQLAlchemy database session
+        session: SQLAlchemy async database session
         telegram_user_id: Telegram user ID (unique identifier)
         name: User's full name
         age: User's age
@@ -35,42 +100,236 @@ def insert_or_update_user(
         Exception: If database operation fails
     """
     try:
-        # Try to find existing user
-        user = session.query(User).filter(
-            User.telegram_user_id == telegram_user_id
-        ).first()
+        user = None
+        dialect = session.get_bind().dialect.name
 
-        if user:
-            # Update existing user
-            logger.info(f"Updating user data for telegram_user_id={telegram_user_id}")
-            user.name = name
-            user.age = age
-            user.address = address
-        else:
-            # Create new user
-            logger.info(f"Creating new user record for telegram_user_id={telegram_user_id}")
-            user = User(
-                telegram_user_id=telegram_user_id,
-                name=name,
-                age=age,
-                address=address
+        user_pk = _USER_ID_CACHE.get(telegram_user_id)
+        if user_pk is not None:
+            # Row is known to exist: a keyed UPDATE skips the insert attempt
+            logger.info("Updating user data for telegram_user_id=%s", telegram_user_id)
+            user = await _update_user(
+                session, dialect, user_pk, telegram_user_id, name, age, address
             )
-            session.add(user)
+            if user is None:
+                # Row was deleted or its id reused since it was cached
+                _USER_ID_CACHE.pop(telegram_user_id, None)
 
-        session.flush()  # Flush to get the updated values
+        if user is None:
+            logger.info("Upserting user record for telegram_user_id=%s", telegram_user_id)
+            user = await _upsert_user(
+                session, dialect, telegram_user_id, name, age, address
+            )
+
+        _USER_ID_CACHE[telegram_user_id] = user.id
         return user
 
     except Exception as e:
-        logger.error(f"Error upserting user {telegram_user_id}: {e}")
+        if not _is_disconnect(e):
+            logger.error("Error upserting user %s: %s", telegram_user_id, e)
         raise
 
 
-def delete_user(session: Session, telegram_user_id: int) -> bool:
+async def _update_user(
+    session: AsyncSession,
+    dialect: str,
+    user_pk: int,
+    telegram_user_id: int,
+    name: str,
+    age: int,
+    address: str
+) -> Optional[User]:
+    """
+    Update an existing user row by primary key.
+
+    The telegram_user_id is matched as well, so a stale cache entry whose id
+    now belongs to another user updates nothing instead of that user's row.
+
+    Returns:
+        Optional[User]: The updated User object, or None if no row matched
+    """
+    stmt = _update_statement(user_pk, telegram_user_id, name, age, address)
+
+    if dialect == "mysql":
+        # MySQL has no RETURNING, so read the row back after the update
+        result = await session.execute(stmt)
+        if result.rowcount == 0:
+            return None
+        return await _fetch_user(session, _GET_BY_PK, {"pk": user_pk})
+
+    result = await session.scalars(
+        stmt.returning(User), execution_options={"populate_existing": True}
+    )
+    return result.first()
+
+
+def _update_statement(
+    user_pk: int,
+    telegram_user_id: int,
+    name: str,
+    age: int,
+    address: str
+) -> Update:
+    """Build the keyed UPDATE for a user row known by primary key."""
+    return update(User).where(
+        User.id == user_pk,
+        User.telegram_user_id == telegram_user_id,
+    ).values(
+        name=name,
+        age=age,
+        address=address,
+    )
+
+
+async def _upsert_user(
+    session: AsyncSession,
+    dialect: str,
+    telegram_user_id: int,
+    name: str,
+    age: int,
+    address: str
+) -> User:
+    """
+    Insert or update a user row with a single dialect-native upsert.
+
+    Returns:
+        User: The created or updated User object
+    """
+    stmt = _upsert_statement(dialect, [{
+        "telegram_user_id": telegram_user_id,
+        "name": name,
+        "age": age,
+        "address": address,
+    }])
+
+    if dialect == "mysql":
+        # MySQL has no RETURNING, so read the row back after the upsert
+        await session.execute(stmt)
+        return await _fetch_user(session, _GET_BY_TID, {"tid": telegram_user_id})
+
+    result = await session.scalars(
+        stmt.returning(User), execution_options={"populate_existing": True}
+    )
+    return result.one()
+
+
+def _upsert_statement(dialect: str, rows: List[Dict[str, Any]]) -> Insert:
+    """
+    Build a dialect-native multi-row upsert for the given user rows.
+
+    Args:
+        dialect: SQLAlchemy dialect name of the session's bind
+        rows: Dicts with telegram_user_id, name, age and address
+
+    Returns:
+        An INSERT ... ON DUPLICATE KEY UPDATE (MySQL) or
+        INSERT ... ON CONFLICT DO UPDATE (PostgreSQL/SQLite) statement
+
+    Raises:
+        ValueError: If the dialect isn't MySQL, PostgreSQL or SQLite
+    """
+    if dialect == "mysql":
+        stmt = mysql_insert(User).values(rows)
+        return stmt.on_duplicate_key_update(
+            name=stmt.inserted.name,
+            age=stmt.inserted.age,
+            address=stmt.inserted.address,
+        )
+
+    if dialect == "postgresql":
+        insert = pg_insert
+    elif dialect == "sqlite":
+        insert = sqlite_insert
+    else:
+        raise ValueError(f"Unsupported database dialect: {dialect}")
+    stmt = insert(User).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[User.telegram_user_id],
+        set_={
+            "name": stmt.excluded.name,
+            "age": stmt.excluded.age,
+            "address": stmt.excluded.address,
+            "updated_at": func.current_timestamp(),
+        },
+    )
+
+
+async def _fetch_user(session: AsyncSession, stmt: Select, params: dict) -> User:
+    """Load a just-written user row, refreshing any stale identity-map copy."""
+    result = await session.scalars(
+        stmt, params, execution_options={"populate_existing": True}
+    )
+    return result.one()
+
+
+@_retry_on_disconnect
+async def bulk_upsert_users(session: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+    """
+    Insert or update many users, upserting the unknown ones in one statement.
+
+    Users in the id cache get the same keyed UPDATE as insert_or_update_user;
+    the rest (and any whose cached row is gone) share one multi-row upsert.
+
+    Args:
+        session: SQLAlchemy async database session
+        rows: Dicts with telegram_user_id, name, age and address
+
+    Raises:
+        Exception: If database operation fails
+    """
+    # An upsert can't touch the same row twice, so keep each user's latest row
+    rows = list({row["telegram_user_id"]: row for row in rows}.values())
+
+    try:
+        logger.info("Upserting batch of %s user records", len(rows))
+        dialect = session.get_bind().dialect.name
+
+        unknown = []
+        for row in rows:
+            user_pk = _USER_ID_CACHE.get(row["telegram_user_id"])
+            if user_pk is not None:
+                result = await session.execute(_update_statement(user_pk, **row))
+                if result.rowcount:
+                    continue
+                # Row was deleted or its id reused since it was cached
+                _USER_ID_CACHE.pop(row["telegram_user_id"], None)
+            unknown.append(row)
+
+        if not unknown:
+            return
+
+        stmt = _upsert_statement(dialect, unknown)
+
+        if dialect == "mysql":
+            # MySQL has no RETURNING, so fetch the ids to warm the cache
+            await session.execute(stmt)
+            result = await session.execute(
+                select(User.telegram_user_id, User.id).where(
+                    User.telegram_user_id.in_(
+                        [row["telegram_user_id"] for row in unknown]
+                    )
+                )
+            )
+        else:
+            result = await session.execute(
+                stmt.returning(User.telegram_user_id, User.id)
+            )
+
+        for telegram_user_id, user_pk in result:
+            _USER_ID_CACHE[telegram_user_id] = user_pk
+
+    except Exception as e:
+        if not _is_disconnect(e):
+            logger.error("Error upserting batch of %s users: %s", len(rows), e)
+        raise
+
+
+@_retry_on_disconnect
+async def delete_user(session: AsyncSession, telegram_user_id: int) -> bool:
     """
     Delete a user by their Telegram user ID.
 
     Args:
-        session: SQLAlchemy database session
+        session: SQLAlchemy async database session
         telegram_user_id: Telegram user ID
 
     Returns:
@@ -80,39 +339,61 @@ def delete_user(session: Session, telegram_user_id: int) -> bool:
         Exception: If database operation fails
     """
     try:
-        user = session.query(User).filter(
-            User.telegram_user_id == telegram_user_id
-        ).first()
+        user = await _load_user(session, telegram_user_id)
+        _USER_ID_CACHE.pop(telegram_user_id, None)
 
         if user:
-            logger.info(f"Deleting user record for telegram_user_id={telegram_user_id}")
-            session.delete(user)
-            session.flush()
+            logger.info("Deleting user record for telegram_user_id=%s", telegram_user_id)
+            await session.delete(user)
+            await session.flush()
             return True
         else:
-            logger.info(f"No user found to delete for telegram_user_id={telegram_user_id}")
+            logger.info("No user found to delete for telegram_user_id=%s", telegram_user_id)
             return False
 
     except Exception as e:
-        logger.error(f"Error deleting user {telegram_user_id}: {e}")
+        if not _is_disconnect(e):
+            logger.error("Error deleting user %s: %s", telegram_user_id, e)
         raise
 
 
-def get_user(session: Session, telegram_user_id: int) -> Optional[User]:
+@_retry_on_disconnect
+async def get_user(session: AsyncSession, telegram_user_id: int) -> Optional[User]:
     """
     Get a user by their Telegram user ID.
 
     Args:
-        session: SQLAlchemy database session
+        session: SQLAlchemy async database session
         telegram_user_id: Telegram user ID
 
     Returns:
         Optional[User]: The User object if found, None otherwise
     """
     try:
-        return session.query(User).filter(
-            User.telegram_user_id == telegram_user_id
-        ).first()
+        return await _load_user(session, telegram_user_id)
     except Exception as e:
-        logger.error(f"Error retrieving user {telegram_user_id}: {e}")
+        if not _is_disconnect(e):
+            logger.error("Error retrieving user %s: %s", telegram_user_id, e)
         raise
+
+
+async def _load_user(session: AsyncSession, telegram_user_id: int) -> Optional[User]:
+    """
+    Load a user, by primary key when the telegram_user_id mapping is cached.
+
+    session.get() checks the identity map first and otherwise selects on the
+    primary key rather than the secondary telegram_user_id index.
+    """
+    user_pk = _USER_ID_CACHE.get(telegram_user_id)
+    if user_pk is not None:
+        user = await session.get(User, user_pk)
+        if user is not None and user.telegram_user_id == telegram_user_id:
+            return user
+        # Row was deleted elsewhere since it was cached
+        _USER_ID_CACHE.pop(telegram_user_id, None)
+
+    result = await session.execute(_GET_BY_TID, {"tid": telegram_user_id})
+    user = result.scalar_one_or_none()
+    if user is not None:
+        _USER_ID_CACHE[telegram_user_id] = user.id
+    return user
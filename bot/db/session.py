@@ -1,59 +1,238 @@
 """
 Database session management and engine initialization.
 """
-from contextlib import contextmanager
-from typing import Generator
+import asyncio
+import ssl
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
 
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 
 from bot.config import Config
+from bot.db.crud import bulk_upsert_users, insert_or_update_user
 from bot.logging_config import get_logger
 
 logger = get_logger(__name__)
 
-# Create database engine
-# Note: pool_pre_ping=True ensures connections are alive before using them
-engine = create_engine(
-    Config.DATABASE_URL,
-    echo=False,  # Set to True for SQL query logging (development only)
-    pool_pre_ping=True,
-    pool_recycle=3600,  # Recycle connections after 1 hour
-)
+# Queued upserts are committed in batches of up to this many rows...
+UPSERT_BATCH_SIZE = 32
+# ...or whatever has arrived this many seconds after the first row
+UPSERT_BATCH_WINDOW = 0.05
 
-# Create session factory
-SessionLocal = sessionmaker(
-    autocommit=False,
-    autoflush=False,
-    bind=engine
-)
+# A queued upsert: the row values and a future resolved once it's committed
+QueuedUpsert = Tuple[Dict[str, Any], asyncio.Future]
+
+# Connectivity probe, built once so its compiled form is reused from the
+# engine's statement cache
+_PING = text("SELECT 1")
+
+# Engine and session factory are built on first use so that importing this
+# module (e.g. from Alembic or tests) doesn't require a configured database
+_engine: Optional[AsyncEngine] = None
+_session_factory: Optional[async_sessionmaker[AsyncSession]] = None
+
+
+def get_engine() -> AsyncEngine:
+    """
+    Get the async database engine, creating it on first call.
+
+    Returns:
+        AsyncEngine: The shared SQLAlchemy async engine
+    """
+    global _engine
+    if _engine is None:
+        connect_args = {}
+        if Config.DATABASE_SSL_CA:
+            # aiomysql takes an SSLContext, not the ssl dict SQLAlchemy
+            # builds from ssl_* URL parameters
+            connect_args["ssl"] = ssl.create_default_context(
+                cafile=Config.DATABASE_SSL_CA
+            )
+
+        # Note: connections aren't pinged on checkout (that costs a round-trip
+        # per session); stale ones are recycled and CRUD retries on disconnect
+        _engine = create_async_engine(
+            Config.DATABASE_URL,
+            echo=False,  # Set to True for SQL query logging (development only)
+            pool_pre_ping=False,
+            pool_recycle=1800,  # Recycle connections after 30 minutes
+            pool_size=10,
+            max_overflow=20,
+            connect_args=connect_args,
+        )
+    return _engine
+
+
+def get_session_factory() -> async_sessionmaker[AsyncSession]:
+    """
+    Get the async session factory, creating it on first call.
+
+    Returns:
+        async_sessionmaker: Factory bound to the shared engine
+    """
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = async_sessionmaker(
+            get_engine(),
+            autoflush=False,
+            expire_on_commit=False,
+        )
+    return _session_factory
+
+
+async def dispose_engine() -> None:
+    """
+    Close all pooled connections and drop the cached engine.
+    """
+    global _engine, _session_factory
+    if _engine is not None:
+        await _engine.dispose()
+    _engine = None
+    _session_factory = None
 
 
-@contextmanager
-def get_db_session() -> Generator[Session, None, None]:
+@asynccontextmanager
+async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
     """
-    Context manager that provides a database session.
+    Async context manager that provides a database session.
 
     Yields:
-        Session: SQLAlchemy database session
+        AsyncSession: SQLAlchemy async database session
 
     Example:
-        with get_db_session() as session:
-            user = session.query(User).first()
+        async with get_db_session() as session:
+            user = await get_user(session, telegram_user_id)
     """
-    session = SessionLocal()
+    session = get_session_factory()()
     try:
         yield session
-        session.commit()
+        await session.commit()
     except Exception as e:
-        session.rollback()
-        logger.error(f"Database session error: {e}")
+        await session.rollback()
+        logger.error("Database session error: %s", e)
         raise
     finally:
-        session.close()
+        await session.close()
+
+
+async def queue_user_upsert(
+    queue: "asyncio.Queue[QueuedUpsert]",
+    telegram_user_id: int,
+    name: str,
+    age: int,
+    address: str
+) -> None:
+    """
+    Queue a user upsert for the batch writer and wait until it is committed.
+
+    Args:
+        queue: Queue drained by run_upsert_worker
+        telegram_user_id: Telegram user ID (unique identifier)
+        name: User's full name
+        age: User's age
+        address: User's address
+
+    Raises:
+        Exception: If the batch containing this upsert failed to commit
+    """
+    row = {
+        "telegram_user_id": telegram_user_id,
+        "name": name,
+        "age": age,
+        "address": address,
+    }
+    committed = asyncio.get_running_loop().create_future()
+    await queue.put((row, committed))
+    await committed
 
 
-def init_db() -> None:
+async def run_upsert_worker(queue: "asyncio.Queue[QueuedUpsert]") -> None:
+    """
+    Drain queued upserts forever, committing each batch in one transaction.
+
+    A batch closes after UPSERT_BATCH_SIZE rows or UPSERT_BATCH_WINDOW
+    seconds, whichever comes first. Cancel the task to stop the worker.
+
+    Args:
+        queue: Queue filled by queue_user_upsert
+    """
+    loop = asyncio.get_running_loop()
+    batch: List[QueuedUpsert] = []
+    try:
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + UPSERT_BATCH_WINDOW
+            while len(batch) < UPSERT_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await _write_upsert_batch(batch)
+            batch = []
+    except asyncio.CancelledError:
+        # Don't leave handlers waiting on rows that will never be written
+        for _, committed in batch:
+            committed.cancel()
+        raise
+
+
+async def _write_upsert_batch(batch: List[QueuedUpsert]) -> None:
+    """
+    Commit one batch of queued upserts and resolve their futures.
+
+    If the batch fails (e.g. one row breaks a constraint), each row is retried
+    in its own transaction so only the users whose rows fail see an error.
+    """
+    try:
+        async with get_db_session() as session:
+            await bulk_upsert_users(session, [row for row, _ in batch])
+    except Exception as e:
+        if len(batch) == 1:
+            _resolve(batch[0][1], e)
+            return
+        logger.warning(
+            "Batch upsert of %s rows failed, retrying rows individually: %s",
+            len(batch), e,
+        )
+        for row, committed in batch:
+            await _write_single_upsert(row, committed)
+    else:
+        for _, committed in batch:
+            _resolve(committed)
+
+
+async def _write_single_upsert(row: Dict[str, Any], committed: asyncio.Future) -> None:
+    """Commit one queued upsert in its own transaction and resolve its future."""
+    try:
+        async with get_db_session() as session:
+            await insert_or_update_user(session, **row)
+    except Exception as e:
+        _resolve(committed, e)
+    else:
+        _resolve(committed)
+
+
+def _resolve(committed: asyncio.Future, error: Optional[Exception] = None) -> None:
+    """Resolve a queued upsert's future unless its waiter already gave up."""
+    if committed.done():
+        return
+    if error is None:
+        committed.set_result(None)
+    else:
+        committed.set_exception(error)
+
+
+async def init_db() -> None:
     """
     Initialize the database by creating all tables.
 
@@ -63,11 +242,23 @@ def init_db() -> None:
     from bot.db.models import Base
 
     logger.info("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
+    async with get_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
     logger.info("Database tables created successfully")
 
 
-def check_db_connection() -> bool:
+async def ping_db() -> None:
+    """
+    Run a single round-trip query against the database.
+
+    Raises:
+        Exception: If the database can't be reached
+    """
+    async with get_engine().connect() as conn:
+        await conn.execute(_PING)
+
+
+async def check_db_connection() -> bool:
     """
     Check if the database connection is working.
 
@@ -75,10 +266,9 @@ def check_db_connection() -> bool:
         bool: True if connection is successful, False otherwise
     """
     try:
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
+        await ping_db()
         logger.info("Database connection successful")
         return True
     except Exception as e:
-        logger.error(f"Database connection failed: {e}")
+        logger.error("Database connection failed: %s", e)
         return False
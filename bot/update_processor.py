@@ -0,0 +1,101 @@
+"""
+Update processor that keeps each chat's updates in order.
+"""
+import asyncio
+import sys
+from typing import Any, Awaitable, Dict, List, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+
+class PerChatUpdateProcessor(BaseUpdateProcessor):
+    """
+    Process updates from different chats concurrently, one at a time per chat.
+
+    ConversationHandler needs a chat's updates handled strictly in order, so
+    each update waits on its chat's lock before running. Locks are created on
+    demand and removed once no update for that chat is running or waiting,
+    so memory doesn't grow with the number of chats ever seen.
+
+    The concurrency limit is only taken once an update holds its chat's lock.
+    BaseUpdateProcessor takes its own semaphore before do_process_update, so
+    that one is left unbounded; otherwise updates queued behind one busy chat
+    would use up every slot and stall all other chats.
+
+    Args:
+        max_concurrent_updates: Maximum number of updates processed at once
+
+    Raises:
+        ValueError: If max_concurrent_updates is not a positive integer
+    """
+
+    def __init__(self, max_concurrent_updates: int = 256):
+        if max_concurrent_updates < 1:
+            raise ValueError("`max_concurrent_updates` must be a positive integer!")
+        # BaseUpdateProcessor sizes its semaphore from max_concurrent_updates,
+        # so report no limit until it has been built
+        self._running_limit = sys.maxsize
+        super().__init__(sys.maxsize)
+        self._running_limit = max_concurrent_updates
+        self._running = asyncio.BoundedSemaphore(max_concurrent_updates)
+        self._running_count = 0
+        # chat_id -> [lock, number of updates holding or waiting on it]
+        self._chat_locks: Dict[int, List[Any]] = {}
+
+    @property
+    def max_concurrent_updates(self) -> int:
+        """int: The maximum number of updates that can be processed concurrently."""
+        return self._running_limit
+
+    @property
+    def current_concurrent_updates(self) -> int:
+        """int: The number of updates currently being processed."""
+        return self._running_count
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        """
+        Run the update's handlers while holding its chat's lock and a slot.
+
+        Args:
+            update: The update to be processed
+            coroutine: Awaitable that processes the update
+        """
+        chat_id = self._chat_id(update)
+        if chat_id is None:
+            await self._run(coroutine)
+            return
+
+        entry = self._chat_locks.get(chat_id)
+        if entry is None:
+            entry = self._chat_locks[chat_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                await self._run(coroutine)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._chat_locks[chat_id]
+
+    async def _run(self, coroutine: Awaitable[Any]) -> None:
+        """Await an update's handlers once a concurrency slot is free."""
+        async with self._running:
+            self._running_count += 1
+            try:
+                await coroutine
+            finally:
+                self._running_count -= 1
+
+    @staticmethod
+    def _chat_id(update: object) -> Optional[int]:
+        """Get the chat an update belongs to, if any."""
+        if isinstance(update, Update) and update.effective_chat is not None:
+            return update.effective_chat.id
+        return None
+
+    async def initialize(self) -> None:
+        """Nothing to set up; locks are created per update."""
+
+    async def shutdown(self) -> None:
+        """Nothing to tear down; locks are dropped once released."""